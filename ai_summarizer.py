@@ -2,14 +2,76 @@
 生成AIを用いた文字起こしテキストの要約モジュール
 """
 import os
+import json
+import hashlib
 import logging
+import functools
+import concurrent.futures
 import google.generativeai as genai
+from google.api_core.exceptions import ResourceExhausted
+from tenacity import (
+    before_sleep_log,
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+)
 
-# ログ設定
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def summarize_transcript_with_ai(file_path, ai_api_key, model_name="gemini-pro"):
+# 要約結果のキャッシュファイル（プロンプトのSHA-256ハッシュ → 要約テキスト）
+LLM_CACHE_PATH = os.path.join('data', 'llm_cache.json')
+
+# 長い文字起こしを分割する際の1チャンクあたりの最大文字数（約4kトークン）
+MAX_CHUNK_CHARS = 12000
+# 分割要約時の生成AIへの同時リクエスト数の上限
+MAX_CONCURRENCY = 4
+# レート制限エラー時の最大試行回数
+MAX_ATTEMPTS = 5
+
+# 要約用プロンプトのテンプレート
+_SUMMARY_PROMPT_TEMPLATE = """
+以下は会議の文字起こしです。この内容を以下の形式で要約してください：
+
+【要約形式】
+## 📋 会議要約
+
+### 🎯 主要議題
+- 重要なポイントを3-5点で簡潔にまとめてください
+
+### 💡 決定事項
+- 会議で決定された事項があれば箇条書きで記載してください
+- 決定事項がない場合は「なし」と記載してください
+
+### 📝 次回アクション・タスク
+- 今後実行すべきアクションやタスクがあれば担当者と期限を含めて記載してください
+- アクションがない場合は「なし」と記載してください
+
+### 📅 次回会議
+- 次回会議の予定があれば記載してください
+- 予定がない場合は「未定」と記載してください
+
+【文字起こし内容】
+{content}
+
+上記の内容を読みやすく、要点を整理して要約してください。専門用語がある場合は簡潔に説明を加えてください。
+"""
+
+# 分割要約（部分要約）用プロンプトのテンプレート
+_CHUNK_PROMPT_TEMPLATE = """
+以下は会議の文字起こしの一部（{index}/{total}）です。
+後で他の部分と統合するため、この部分に含まれる以下の情報を漏れなく箇条書きで抽出してください：
+
+- 議題と重要なポイント
+- 決定事項
+- アクション・タスク（担当者と期限を含む）
+- 次回会議の予定
+
+【文字起こし内容（{index}/{total}）】
+{content}
+"""
+
+def summarize_transcript_with_ai(file_path, ai_api_key, model_name="gemini-pro", on_progress=None):
     """
     ダウンロードした文字起こしファイルからテキストを読み込み、生成AIを用いて要約
     
@@ -17,39 +79,54 @@ def summarize_transcript_with_ai(file_path, ai_api_key, model_name="gemini-pro")
         file_path (str): .md形式で保存された文字起こしファイルのパス
         ai_api_key (str): 生成AIサービスのAPIキー
         model_name (str, optional): 使用する生成AIのモデル名
+        on_progress (callable, optional): 指定した場合は要約をストリーミングで生成し、
+                                          受信するたびにそれまでの要約テキストを渡して呼び出す
     
     Returns:
         str: 生成AIによって要約されたテキスト、失敗した場合はNone
     """
     try:
-        # ファイルの存在確認
-        if not os.path.exists(file_path):
+        # ファイルからテキストを読み込み
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except FileNotFoundError:
             logger.error(f"ファイルが見つかりません: {file_path}")
             return None
         
-        # ファイルからテキストを読み込み
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
         if not content.strip():
             logger.error("ファイルの内容が空です。")
             return None
         
-        # Google Generative AI APIの設定
-        genai.configure(api_key=ai_api_key)
-        model = genai.GenerativeModel(model_name)
+        # Google Generative AI APIの設定（同じキー・モデルならクライアントを再利用）
+        model = _get_model(ai_api_key, model_name)
         
         # 要約プロンプトの作成
         prompt = _create_summary_prompt(content)
         
+        # 同一プロンプトの要約が既にあればAPIを呼ばずに返す
+        cache = _load_cache()
+        cache_key = _cache_key(model_name, prompt)
+        if cache_key in cache:
+            logger.info("キャッシュ済みの要約を使用します。")
+            return cache[cache_key]
+        
         logger.info("生成AIによる要約を開始します...")
         
-        # 生成AIで要約を生成
-        response = model.generate_content(prompt)
+        # 生成AIで要約を生成（長い場合は分割して並列に要約してから統合）
+        chunks = _split_chunks(content)
+        if len(chunks) > 1:
+            logger.info(f"文字起こしが長いため、{len(chunks)}個に分割して要約します。")
+            summary_text = _summarize_chunks(model, chunks)
+        else:
+            summary_text = _generate(model, prompt, on_progress)
         
-        if response.text:
+        if summary_text:
             logger.info("要約が正常に生成されました。")
-            return response.text.strip()
+            summary = summary_text.strip()
+            cache[cache_key] = summary
+            _save_cache(cache)
+            return summary
         else:
             logger.error("生成AIからの応答が空です。")
             return None
@@ -58,47 +135,186 @@ def summarize_transcript_with_ai(file_path, ai_api_key, model_name="gemini-pro")
         logger.error(f"要約処理でエラーが発生しました: {str(e)}")
         return None
 
-def _create_summary_prompt(content):
+_exponential_wait = wait_exponential(multiplier=1, max=30)
+
+def _wait_for_rate_limit(retry_state):
     """
-    要約用のプロンプトを作成
+    指数バックオフの待機時間と、エラーで指定された待機時間（retry_delay）の長い方を返す
     
     Args:
-        content (str): 要約対象のテキスト
+        retry_state: tenacityのリトライ状態
     
     Returns:
-        str: 要約用プロンプト
+        float: 待機時間（秒）
     """
-    prompt = f"""
-以下は会議の文字起こしです。この内容を以下の形式で要約してください：
+    wait = _exponential_wait(retry_state)
+    error = retry_state.outcome.exception()
+    for detail in getattr(error, 'details', None) or []:
+        retry_delay = getattr(detail, 'retry_delay', None)
+        if retry_delay is not None:
+            wait = max(wait, retry_delay.seconds + retry_delay.nanos / 1e9)
+    return wait
 
-【要約形式】
-## 📋 会議要約
+# レート制限（429）の場合は要約処理全体をやり直さず、その呼び出しのみを再試行する
+_retry_on_rate_limit = retry(
+    wait=_wait_for_rate_limit,
+    stop=stop_after_attempt(MAX_ATTEMPTS),
+    retry=retry_if_exception_type(ResourceExhausted),
+    before_sleep=before_sleep_log(logger, logging.WARNING),
+    reraise=True,
+)
 
-### 🎯 主要議題
-- 重要なポイントを3-5点で簡潔にまとめてください
+@_retry_on_rate_limit
+def _generate(model, prompt, on_progress=None):
+    """
+    生成AIでテキストを生成（on_progressを指定した場合はストリーミングで生成）
+    
+    Args:
+        model: 生成AIのモデル
+        prompt (str): プロンプト
+        on_progress (callable, optional): 受信するたびにそれまでのテキストを渡して呼び出す関数
+    
+    Returns:
+        str: 生成されたテキスト
+    """
+    if on_progress is None:
+        return model.generate_content(prompt).text
+    
+    text = ''
+    for chunk in model.generate_content(prompt, stream=True):
+        text += chunk.text
+        on_progress(text)
+    return text
 
-### 💡 決定事項
-- 会議で決定された事項があれば箇条書きで記載してください
-- 決定事項がない場合は「なし」と記載してください
+@functools.lru_cache(maxsize=4)
+def _get_model(ai_api_key, model_name):
+    """
+    APIキーとモデル名ごとに生成AIのモデルを作成し、再利用する
+    
+    Args:
+        ai_api_key (str): 生成AIサービスのAPIキー
+        model_name (str): 使用する生成AIのモデル名
+    
+    Returns:
+        genai.GenerativeModel: 設定済みのモデル
+    """
+    genai.configure(api_key=ai_api_key)
+    return genai.GenerativeModel(model_name)
 
-### 📝 次回アクション・タスク
-- 今後実行すべきアクションやタスクがあれば担当者と期限を含めて記載してください
-- アクションがない場合は「なし」と記載してください
+def _split_chunks(content, max_chars=MAX_CHUNK_CHARS):
+    """
+    テキストを段落（行）の区切りでおおよそmax_chars文字ごとのチャンクに分割
+    
+    Args:
+        content (str): 分割対象のテキスト
+        max_chars (int, optional): 1チャンクあたりの最大文字数
+    
+    Returns:
+        list: 分割されたテキストのリスト
+    """
+    chunks = []
+    current = []
+    current_len = 0
+    
+    for line in content.splitlines(keepends=True):
+        # 1行だけで上限を超える場合は強制的に分割
+        while len(line) > max_chars:
+            if current:
+                chunks.append(''.join(current))
+                current, current_len = [], 0
+            chunks.append(line[:max_chars])
+            line = line[max_chars:]
+        
+        if current_len + len(line) > max_chars and current:
+            chunks.append(''.join(current))
+            current, current_len = [], 0
+        
+        current.append(line)
+        current_len += len(line)
+    
+    if current:
+        chunks.append(''.join(current))
+    
+    return chunks
 
-### 📅 次回会議
-- 次回会議の予定があれば記載してください
-- 予定がない場合は「未定」と記載してください
+def _summarize_chunks(model, chunks, max_concurrency=MAX_CONCURRENCY):
+    """
+    分割したチャンクをスレッドプールで並列に部分要約し、それらを統合して最終的な要約を作成
+    
+    モデルは_get_modelでプロセス内に共有されるため、イベントループに紐づく非同期クライアントではなく
+    同期のgenerate_contentを使用する
+    
+    Args:
+        model: 生成AIのモデル
+        chunks (list): 分割された文字起こしテキスト
+        max_concurrency (int, optional): 同時リクエスト数の上限
+    
+    Returns:
+        str: 統合された要約テキスト、失敗した場合はNone
+    """
+    total = len(chunks)
+    prompts = [_create_chunk_prompt(chunk, i, total) for i, chunk in enumerate(chunks, start=1)]
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        partial_summaries = list(executor.map(lambda prompt: _generate(model, prompt), prompts))
+    
+    if not all(partial_summaries):
+        logger.error("部分要約の生成に失敗しました。")
+        return None
+    
+    logger.info("部分要約を統合しています...")
+    combined = '\n\n'.join(partial_summaries)
+    return _generate(model, _create_summary_prompt(combined))
 
-【文字起こし内容】
-{content}
+def _cache_key(model_name, prompt):
+    """
+    モデル名とプロンプトからキャッシュキーを作成
+    
+    Args:
+        model_name (str): 生成AIのモデル名
+        prompt (str): 要約用プロンプト
+    
+    Returns:
+        str: SHA-256ハッシュの16進文字列
+    """
+    return hashlib.sha256((model_name + "\0" + prompt).encode('utf-8')).hexdigest()
 
-上記の内容を読みやすく、要点を整理して要約してください。専門用語がある場合は簡潔に説明を加えてください。
-"""
-    return prompt
+@functools.lru_cache(maxsize=1)
+def _load_cache():
+    """
+    要約キャッシュをファイルから読み込む（プロセス内では一度だけ読み込む）
+    
+    Returns:
+        dict: キャッシュキーと要約テキストの辞書
+    """
+    try:
+        with open(LLM_CACHE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"要約キャッシュの読み込みに失敗しました: {str(e)}")
+        return {}
+
+def _save_cache(cache):
+    """
+    要約キャッシュをファイルへ書き込む（一時ファイル経由で置き換える）
+    
+    Args:
+        cache (dict): キャッシュキーと要約テキストの辞書
+    """
+    try:
+        os.makedirs(os.path.dirname(LLM_CACHE_PATH), exist_ok=True)
+        tmp_path = LLM_CACHE_PATH + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(tmp_path, LLM_CACHE_PATH)
+    except OSError as e:
+        logger.warning(f"要約キャッシュの書き込みに失敗しました: {str(e)}")
 
-def _create_summary_prompt_openai_style(content):
+def _create_summary_prompt(content):
     """
-    OpenAI API用の要約プロンプト（参考用）
+    要約用のプロンプトを作成
     
     Args:
         content (str): 要約対象のテキスト
@@ -106,89 +322,25 @@ def _create_summary_prompt_openai_style(content):
     Returns:
         str: 要約用プロンプト
     """
-    prompt = f"""
-Please summarize the following meeting transcript in Japanese. Format the summary as follows:
-
-## 📋 会議要約
-
-### 🎯 主要議題
-[List 3-5 key points discussed]
-
-### 💡 決定事項
-[List decisions made, or state "なし" if none]
-
-### 📝 次回アクション・タスク
-[List action items with assignees and deadlines, or state "なし" if none]
+    return _SUMMARY_PROMPT_TEMPLATE.format(content=content)
 
-### 📅 次回会議
-[Next meeting details, or state "未定" if not scheduled]
-
-Transcript:
-{content}
-
-Make the summary clear, concise, and well-organized in Japanese.
-"""
-    return prompt
-
-# OpenAI APIを使用する場合の実装例（参考用）
-def summarize_transcript_with_openai(file_path, openai_api_key, model_name="gpt-3.5-turbo"):
+def _create_chunk_prompt(content, index, total):
     """
-    OpenAI APIを使用した要約（参考実装）
+    分割要約（部分要約）用のプロンプトを作成
     
     Args:
-        file_path (str): .md形式で保存された文字起こしファイルのパス
-        openai_api_key (str): OpenAI APIキー
-        model_name (str, optional): 使用するOpenAIのモデル名
+        content (str): 要約対象のテキスト（文字起こしの一部）
+        index (int): チャンクの番号（1始まり）
+        total (int): チャンクの総数
     
     Returns:
-        str: 生成AIによって要約されたテキスト、失敗した場合はNone
+        str: 部分要約用プロンプト
     """
-    try:
-        # この実装にはopenaiライブラリが必要です
-        # pip install openai
-        
-        import openai
-        
-        # ファイルからテキストを読み込み
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        if not content.strip():
-            logger.error("ファイルの内容が空です。")
-            return None
-        
-        # OpenAI APIの設定
-        openai.api_key = openai_api_key
-        
-        # 要約プロンプトの作成
-        prompt = _create_summary_prompt_openai_style(content)
-        
-        logger.info("OpenAI APIによる要約を開始します...")
-        
-        # OpenAI APIで要約を生成
-        response = openai.ChatCompletion.create(
-            model=model_name,
-            messages=[
-                {"role": "system", "content": "あなたは会議の文字起こしを要約する専門家です。"},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=2000,
-            temperature=0.7
-        )
-        
-        if response.choices[0].message.content:
-            logger.info("要約が正常に生成されました。")
-            return response.choices[0].message.content.strip()
-        else:
-            logger.error("OpenAI APIからの応答が空です。")
-            return None
-            
-    except Exception as e:
-        logger.error(f"OpenAI API要約処理でエラーが発生しました: {str(e)}")
-        return None
+    return _CHUNK_PROMPT_TEMPLATE.format(content=content, index=index, total=total)
 
 if __name__ == "__main__":
-    # テスト実行用
+    # テスト実行用（ログ設定はmain.pyで一元管理しているため、単体実行時のみ設定する）
+    logging.basicConfig(level=logging.INFO)
     from config import load_environment_variables
     
     try:
@@ -2,16 +2,22 @@
 環境変数の設定と読み込み
 """
 import os
+import functools
 from dotenv import load_dotenv
 
+@functools.lru_cache(maxsize=1)
 def load_environment_variables():
     """
-    .envファイルから環境変数を読み込む
+    .envファイルから環境変数を読み込む（同一プロセス内では初回の結果を再利用）
+    
+    環境変数SKIP_DOTENVが真（1, true, yes, on）の場合は.envファイルを読み込まず、
+    既に設定されている環境変数のみを使用する
     
     Returns:
         dict: 環境変数の辞書
     """
-    load_dotenv()
+    if os.getenv('SKIP_DOTENV', '').strip().lower() not in ('1', 'true', 'yes', 'on'):
+        load_dotenv()
     
     env_vars = {
         'google_credentials_path': os.getenv('GOOGLE_CREDENTIALS_PATH'),
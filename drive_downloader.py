@@ -3,18 +3,79 @@ Google Driveから最新の文字起こしファイルを取得するモジュ
 """
 import os
 import io
+import json
+import functools
+import threading
+import tempfile
+import concurrent.futures
 from datetime import datetime
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseDownload
 from google.oauth2 import service_account
 from docx import Document
+from docx.oxml.ns import qn
 import logging
 
-# ログ設定
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def download_latest_transcript_from_drive(folder_id, credentials_path, target_directory):
+# ダウンロード時にメモリ上に保持する最大サイズ（超えた分は一時ファイルに退避）
+SPOOL_MAX_SIZE = 8 << 20
+
+# Google Drive APIのスコープ
+SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
+
+# 複数ファイルを並列ダウンロードする際の最大スレッド数
+MAX_DOWNLOAD_WORKERS = 8
+
+# 処理状態（処理済みの更新日時・投稿済みファイルのチェックサム）を保存するファイル名（target_directory内に作成）
+STATE_FILENAME = 'state.json'
+
+# 文字起こしファイルの検索クエリ（文字起こし関連のファイル名でフィルタ）
+_QUERY_TMPL = "'{}' in parents and (name contains '会議の録音' or name contains 'meeting' or name contains 'transcript')"
+
+@functools.lru_cache(maxsize=4)
+def _load_credentials(credentials_path):
+    """
+    サービスアカウントキーから認証情報を作成し、再利用する
+    
+    Args:
+        credentials_path (str): GoogleサービスアカウントキーのJSONファイルパス
+    
+    Returns:
+        service_account.Credentials: 認証情報
+    """
+    return service_account.Credentials.from_service_account_file(
+        credentials_path, scopes=SCOPES
+    )
+
+def _build_service(credentials):
+    """
+    Google Drive APIサービスを構築（ライブラリ同梱のディスカバリ文書を使用し、ネットワークから取得しない）
+    
+    Args:
+        credentials (service_account.Credentials): 認証情報
+    
+    Returns:
+        Google Drive APIサービス
+    """
+    return build('drive', 'v3', credentials=credentials, static_discovery=True, cache_discovery=False)
+
+@functools.lru_cache(maxsize=4)
+def _drive_service(credentials_path):
+    """
+    認証情報ごとにGoogle Drive APIサービスを構築し、再利用する
+    
+    HTTPクライアントはスレッドセーフではないため、並列処理のスレッド内では使用せず_build_serviceで個別に構築すること
+    
+    Args:
+        credentials_path (str): GoogleサービスアカウントキーのJSONファイルパス
+    
+    Returns:
+        Google Drive APIサービス
+    """
+    return _build_service(_load_credentials(credentials_path))
+
+def download_latest_transcript_from_drive(folder_id, credentials_path, target_directory, skip_unchanged=False):
     """
     Google Driveから最新の文字起こしファイルをダウンロードし、.md形式で保存
     
@@ -22,35 +83,33 @@ def download_latest_transcript_from_drive(folder_id, credentials_path, target_di
         folder_id (str): 文字起こしファイルが保存されているGoogle DriveのフォルダID
         credentials_path (str): GoogleサービスアカウントキーのJSONファイルパス
         target_directory (str): ダウンロードしたファイルを保存するローカルのディレクトリパス
+        skip_unchanged (bool, optional): Trueの場合、前回投稿したファイルから変更がなければダウンロードしない
     
     Returns:
-        tuple: (ダウンロードして保存した.mdファイルのパス, 元のGoogle DocのURL)
-               失敗した場合は (None, None)
+        tuple: (ダウンロードして保存した.mdファイルのパス, 元のGoogle DocのURL, スキップしたかどうか)
+               変更がなくスキップした場合は (None, 元のGoogle DocのURL, True)
+               失敗した場合は (None, None, False)
     """
     try:
-        # 認証情報の設定
-        SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
-        credentials = service_account.Credentials.from_service_account_file(
-            credentials_path, scopes=SCOPES
-        )
-        
-        # Google Drive APIサービスの構築
-        service = build('drive', 'v3', credentials=credentials)
+        # Google Drive APIサービスの取得（同一プロセス内では再利用）
+        service = _drive_service(credentials_path)
         
         # 指定フォルダ内のファイルを取得（文字起こし関連のファイル名でフィルタ）
-        query = f"'{folder_id}' in parents and (name contains '会議の録音' or name contains 'meeting' or name contains 'transcript')"
+        query = _QUERY_TMPL.format(folder_id)
         
+        # 使用するのは最新の1件のみのため、1件だけ取得する
         results = service.files().list(
             q=query,
             orderBy='modifiedTime desc',  # 最新の更新日時でソート
-            fields="files(id, name, mimeType, modifiedTime, webViewLink)"
+            pageSize=1,
+            fields="files(id,name,mimeType,modifiedTime,webViewLink,md5Checksum)"
         ).execute()
         
         files = results.get('files', [])
         
         if not files:
             logger.warning("指定されたフォルダに文字起こしファイルが見つかりません。")
-            return None, None
+            return None, None, False
         
         # 最新のファイルを選択
         latest_file = files[0]
@@ -64,32 +123,215 @@ def download_latest_transcript_from_drive(folder_id, credentials_path, target_di
         # ターゲットディレクトリを作成
         os.makedirs(target_directory, exist_ok=True)
         
+        # 前回投稿したファイルから変更がなければ以降の処理を行わない
+        # （Google Docにはmd5Checksumがないため、更新日時で比較する）
+        state_path = os.path.join(target_directory, STATE_FILENAME)
+        file_version = latest_file.get('md5Checksum') or latest_file['modifiedTime']
+        if skip_unchanged and _load_state(state_path).get('posted', {}).get(file_id) == file_version:
+            logger.info(f"前回投稿したファイルから変更がないため、スキップします: {file_name}")
+            return None, web_view_link, True
+        
         # ファイル内容を取得
         content = _download_file_content(service, file_id, mime_type)
         
         if content is None:
             logger.error("ファイル内容の取得に失敗しました。")
-            return None, None
+            return None, None, False
         
         # .md形式で保存
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         md_filename = f"transcript_{timestamp}.md"
         md_filepath = os.path.join(target_directory, md_filename)
         
-        with open(md_filepath, 'w', encoding='utf-8') as f:
-            f.write(f"# 会議文字起こし\n\n")
-            f.write(f"**元ファイル名:** {file_name}\n")
-            f.write(f"**更新日時:** {latest_file['modifiedTime']}\n")
-            f.write(f"**元のURL:** {web_view_link}\n\n")
-            f.write("## 内容\n\n")
-            f.write(content)
+        _write_markdown(md_filepath, latest_file, content)
+        
+        # 投稿完了時にmark_transcript_postedで記録するため、ダウンロードしたファイルを控えておく
+        _update_state(state_path, pending={'file_id': file_id, 'version': file_version})
         
         logger.info(f"ファイルを保存しました: {md_filepath}")
-        return md_filepath, web_view_link
+        return md_filepath, web_view_link, False
+        
+    except Exception as e:
+        logger.error(f"Google Driveからのダウンロードでエラーが発生しました: {str(e)}")
+        return None, None, False
+
+def mark_transcript_posted(target_directory):
+    """
+    download_latest_transcript_from_driveで最後にダウンロードしたファイルを投稿済みとして記録
+    
+    Args:
+        target_directory (str): ダウンロードしたファイルを保存したローカルのディレクトリパス
+    """
+    state_path = os.path.join(target_directory, STATE_FILENAME)
+    state = _load_state(state_path)
+    pending = state.get('pending')
+    if not pending:
+        return
+    
+    posted = state.get('posted', {})
+    posted[pending['file_id']] = pending['version']
+    _update_state(state_path, posted=posted, pending=None)
+
+def download_new_transcripts(folder_id, credentials_path, target_directory, since_ts=None):
+    """
+    前回処理以降に更新された文字起こしファイルを並列にダウンロードし、.md形式で保存
+    
+    Args:
+        folder_id (str): 文字起こしファイルが保存されているGoogle DriveのフォルダID
+        credentials_path (str): GoogleサービスアカウントキーのJSONファイルパス
+        target_directory (str): ダウンロードしたファイルを保存するローカルのディレクトリパス
+        since_ts (str, optional): この更新日時（RFC 3339形式）以降のファイルのみを対象とする
+                                  （同じ更新日時で処理済みのファイルは除く）
+                                  省略した場合は状態ファイルに記録された前回処理日時を使用
+    
+    Returns:
+        list: (ダウンロードして保存した.mdファイルのパス, 元のGoogle DocのURL) のリスト
+              失敗した場合は空のリスト
+    """
+    try:
+        # Google Drive APIサービスの取得（同一プロセス内では再利用）
+        service = _drive_service(credentials_path)
+        
+        os.makedirs(target_directory, exist_ok=True)
+        state_path = os.path.join(target_directory, STATE_FILENAME)
+        state = _load_state(state_path)
+        if since_ts is None:
+            since_ts = state.get('last_processed_ts')
+        
+        # 前回処理日時と同じ更新日時のファイルには未処理のものがありうるため、
+        # 「以降」で取得し、その日時で処理済みのファイルIDを除外する
+        processed_ids = set()
+        if since_ts and since_ts == state.get('last_processed_ts'):
+            processed_ids = set(state.get('processed_ids', []))
+        
+        # 指定フォルダ内の未処理のファイルを古い順に取得
+        query = _QUERY_TMPL.format(folder_id)
+        if since_ts:
+            query += f" and modifiedTime >= '{since_ts}'"
+        
+        files = []
+        page_token = None
+        while True:
+            results = service.files().list(
+                q=query,
+                orderBy='modifiedTime',
+                pageToken=page_token,
+                fields="nextPageToken,files(id,name,mimeType,modifiedTime,webViewLink)"
+            ).execute()
+            files.extend(results.get('files', []))
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                break
+        
+        files = [
+            file_info for file_info in files
+            if not (file_info['modifiedTime'] == since_ts and file_info['id'] in processed_ids)
+        ]
+        
+        if not files:
+            logger.info("新しい文字起こしファイルはありません。")
+            return []
+        
+        logger.info(f"{len(files)}件の新しい文字起こしファイルをダウンロードします...")
+        
+        # Drive APIのHTTPクライアントはスレッドセーフではないため、スレッドごとにサービスを構築する（認証情報は共有）
+        credentials = _load_credentials(credentials_path)
+        thread_local = threading.local()
+        
+        def download(file_info):
+            if not hasattr(thread_local, 'service'):
+                thread_local.service = _build_service(credentials)
+            content = _download_file_content(thread_local.service, file_info['id'], file_info['mimeType'])
+            if content is None:
+                return None
+            md_filepath = os.path.join(target_directory, f"transcript_{file_info['id']}.md")
+            _write_markdown(md_filepath, file_info, content)
+            logger.info(f"ファイルを保存しました: {md_filepath}")
+            return md_filepath, file_info['webViewLink']
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_DOWNLOAD_WORKERS) as executor:
+            results = list(executor.map(download, files))
+        
+        # 失敗したファイルは次回再取得できるよう、最初の失敗より前までを処理済みとする
+        # 最後の更新日時で処理済みのファイルIDも記録し、同じ日時の未処理ファイルを取りこぼさないようにする
+        downloaded = []
+        last_processed_ts = since_ts
+        for file_info, result in zip(files, results):
+            if result is None:
+                logger.error(f"ファイル内容の取得に失敗しました: {file_info['name']}")
+                break
+            downloaded.append(result)
+            if file_info['modifiedTime'] != last_processed_ts:
+                last_processed_ts = file_info['modifiedTime']
+                processed_ids = set()
+            processed_ids.add(file_info['id'])
+        
+        if downloaded:
+            _update_state(
+                state_path,
+                last_processed_ts=last_processed_ts,
+                processed_ids=sorted(processed_ids)
+            )
+        
+        return downloaded
         
     except Exception as e:
         logger.error(f"Google Driveからのダウンロードでエラーが発生しました: {str(e)}")
-        return None, None
+        return []
+
+def _write_markdown(md_filepath, file_info, content):
+    """
+    ダウンロードしたファイルの内容を.md形式で保存
+    
+    Args:
+        md_filepath (str): 保存先の.mdファイルのパス
+        file_info (dict): Google Drive APIのファイル情報
+        content (str): ファイルの内容（テキスト）
+    """
+    with open(md_filepath, 'w', encoding='utf-8') as f:
+        f.write(f"# 会議文字起こし\n\n")
+        f.write(f"**元ファイル名:** {file_info['name']}\n")
+        f.write(f"**更新日時:** {file_info['modifiedTime']}\n")
+        f.write(f"**元のURL:** {file_info['webViewLink']}\n\n")
+        f.write("## 内容\n\n")
+        f.write(content)
+
+def _load_state(state_path):
+    """
+    処理状態を状態ファイルから読み込む
+    
+    Args:
+        state_path (str): 状態ファイルのパス
+    
+    Returns:
+        dict: 処理状態、ファイルがない場合は空の辞書
+    """
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"状態ファイルの読み込みに失敗しました: {str(e)}")
+        return {}
+
+def _update_state(state_path, **values):
+    """
+    状態ファイルの指定した項目を更新する（一時ファイル経由で置き換える）
+    
+    Args:
+        state_path (str): 状態ファイルのパス
+        **values: 更新する項目と値
+    """
+    try:
+        state = _load_state(state_path)
+        state.update(values)
+        tmp_path = state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, state_path)
+    except OSError as e:
+        logger.warning(f"状態ファイルの書き込みに失敗しました: {str(e)}")
 
 def _download_file_content(service, file_id, mime_type):
     """
@@ -117,23 +359,46 @@ def _download_file_content(service, file_id, mime_type):
             logger.warning(f"サポートされていないファイル形式: {mime_type}")
             return None
         
-        file_io = io.BytesIO()
-        downloader = MediaIoBaseDownload(file_io, request)
-        
-        done = False
-        while done is False:
-            status, done = downloader.next_chunk()
-        
-        file_io.seek(0)
-        
-        # ファイル形式に応じてテキストを抽出
-        if mime_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
-            # .docxファイルからテキストを抽出
-            document = Document(file_io)
-            content = '\n'.join([paragraph.text for paragraph in document.paragraphs])
-        else:
-            # プレーンテキストファイル
-            content = file_io.getvalue().decode('utf-8')
+        # 小さいファイルはメモリ上、大きいファイルは一時ファイルに書き出す
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as file_io:
+            downloader = MediaIoBaseDownload(file_io, request)
+            
+            done = False
+            while done is False:
+                status, done = downloader.next_chunk()
+            
+            file_io.seek(0)
+            
+            # ファイル形式に応じてテキストを抽出
+            if mime_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
+                # .docxファイルからテキストを抽出（段落ごとにバッファへ書き込む）
+                # Paragraphオブジェクトを経由せず、段落（w:p）に属するラン（w:r）の要素を直接走査する
+                # 対象は段落直下とハイパーリンク内のランのみ（テキストボックス内のランは
+                # mc:Choice/mc:Fallbackに重複して格納されているため含めない）
+                # タブ（w:tab）は\t、改行（w:br, w:cr）は\nとして出力する
+                # （段落書式のタブ位置設定もw:tabのため、ランの直下の要素のみを対象とする）
+                # Python 3.10以前のSpooledTemporaryFileにはseekable()がなくzipfileで読めないため、
+                # 内部の実体（メモリ上はBytesIO、退避後は一時ファイル）を渡す
+                document = Document(file_io._file)
+                buf = io.StringIO()
+                buf_write = buf.write
+                w_t = qn('w:t')
+                w_tab = qn('w:tab')
+                run_tags = (w_t, w_tab, qn('w:br'), qn('w:cr'))
+                for paragraph in document.element.body.iterchildren(qn('w:p')):
+                    for run in paragraph.xpath('./w:r | ./w:hyperlink/w:r'):
+                        for element in run.iterchildren(*run_tags):
+                            if element.tag == w_t:
+                                buf_write(element.text or '')
+                            elif element.tag == w_tab:
+                                buf_write('\t')
+                            else:
+                                buf_write('\n')
+                    buf_write('\n')
+                content = buf.getvalue()
+            else:
+                # プレーンテキストファイル
+                content = file_io.read().decode('utf-8')
         
         return content
         
@@ -142,13 +407,14 @@ def _download_file_content(service, file_id, mime_type):
         return None
 
 if __name__ == "__main__":
-    # テスト実行用
+    # テスト実行用（ログ設定はmain.pyで一元管理しているため、単体実行時のみ設定する）
+    logging.basicConfig(level=logging.INFO)
     from config import load_environment_variables
     
     try:
         env_vars = load_environment_variables()
         
-        file_path, doc_url = download_latest_transcript_from_drive(
+        file_path, doc_url, _ = download_latest_transcript_from_drive(
             env_vars['google_drive_folder_id'],
             env_vars['google_credentials_path'],
             env_vars['target_directory']
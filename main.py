@@ -3,13 +3,14 @@ Google Meet文字起こし自動要約・Slack投稿アプリケーション
 メイン処理モジュール
 """
 import sys
+import asyncio
 import logging
 from datetime import datetime
 
 from config import load_environment_variables
-from drive_downloader import download_latest_transcript_from_drive
+from drive_downloader import download_latest_transcript_from_drive, mark_transcript_posted
 from ai_summarizer import summarize_transcript_with_ai
-from slack_poster import post_summary_to_slack, test_slack_connection
+from slack_poster import post_summary_to_slack, test_slack_connection, StreamingSlackPost
 
 # ログ設定
 logging.basicConfig(
@@ -22,9 +23,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def main():
+async def main():
     """
     メイン処理：Google Driveから文字起こしを取得し、要約してSlackに投稿
+    
+    Slack接続テストとGoogle Driveからのダウンロードは互いに独立しているため、
+    asyncio.gatherで並行実行してネットワーク待ち時間を重ねる
     """
     try:
         logger.info("=== Google Meet文字起こし要約・Slack投稿処理を開始 ===")
@@ -34,20 +38,30 @@ def main():
         env_vars = load_environment_variables()
         logger.info("環境変数の読み込みが完了しました。")
         
-        # 2. Slack接続テスト
-        logger.info("Slack接続をテスト中...")
-        if not test_slack_connection(env_vars['slack_bot_token']):
+        # 2. Slack接続テスト と 3. Google Driveから最新の文字起こしファイルをダウンロード（並行実行）
+        logger.info("Slack接続テストとGoogle Driveからのダウンロードを並行して実行中...")
+        auth_task = asyncio.create_task(
+            asyncio.to_thread(test_slack_connection, env_vars['slack_bot_token'])
+        )
+        dl_task = asyncio.create_task(
+            asyncio.to_thread(
+                download_latest_transcript_from_drive,
+                env_vars['google_drive_folder_id'],
+                env_vars['google_credentials_path'],
+                env_vars['target_directory'],
+                skip_unchanged=True
+            )
+        )
+        slack_ok, (file_path, google_doc_url, skipped) = await asyncio.gather(auth_task, dl_task)
+        
+        if not slack_ok:
             logger.error("Slack接続テストに失敗しました。処理を中止します。")
             return False
         logger.info("Slack接続テストに成功しました。")
         
-        # 3. Google Driveから最新の文字起こしファイルをダウンロード
-        logger.info("Google Driveから最新の文字起こしファイルをダウンロード中...")
-        file_path, google_doc_url = download_latest_transcript_from_drive(
-            env_vars['google_drive_folder_id'],
-            env_vars['google_credentials_path'],
-            env_vars['target_directory']
-        )
+        if skipped:
+            logger.info("最新の文字起こしは投稿済みのため、処理を終了します。")
+            return True
         
         if not file_path or not google_doc_url:
             logger.error("Google Driveからのファイルダウンロードに失敗しました。処理を中止します。")
@@ -55,35 +69,55 @@ def main():
         
         logger.info(f"ファイルダウンロードが完了しました: {file_path}")
         
-        # 4. 生成AIで要約を生成
+        # 4. 生成AIで要約を生成（生成途中の要約を順次Slackに反映する）
         logger.info("生成AIを用いて要約を生成中...")
-        summary_text = summarize_transcript_with_ai(
-            file_path,
-            env_vars['google_ai_api_key'],
-            env_vars['ai_model_name']
-        )
-        
-        if not summary_text:
-            logger.error("要約の生成に失敗しました。処理を中止します。")
-            return False
-        
-        logger.info("要約の生成が完了しました。")
-        logger.debug(f"要約内容: {summary_text[:200]}...")  # 最初の200文字のみログ出力
-        
-        # 5. Slackに要約を投稿
-        logger.info("Slackに要約を投稿中...")
-        success = post_summary_to_slack(
+        slack_stream = StreamingSlackPost(
             env_vars['slack_bot_token'],
             env_vars['slack_channel_id'],
-            summary_text,
             google_doc_url
         )
-        
-        if not success:
-            logger.error("Slackへの投稿に失敗しました。")
-            return False
-        
-        logger.info("Slackへの投稿が完了しました。")
+        posted = False
+        try:
+            summary_text = await asyncio.to_thread(
+                summarize_transcript_with_ai,
+                file_path,
+                env_vars['google_ai_api_key'],
+                env_vars['ai_model_name'],
+                slack_stream.update
+            )
+            
+            if not summary_text:
+                logger.error("要約の生成に失敗しました。処理を中止します。")
+                return False
+            
+            logger.info("要約の生成が完了しました。")
+            logger.debug(f"要約内容: {summary_text[:200]}...")  # 最初の200文字のみログ出力
+            
+            # 5. Slackに要約を投稿
+            logger.info("Slackに要約を投稿中...")
+            if slack_stream.ts:
+                # 生成途中に投稿済みのメッセージを完成した要約で更新
+                success = await asyncio.to_thread(slack_stream.finalize, summary_text)
+            else:
+                success = await post_summary_to_slack(
+                    env_vars['slack_bot_token'],
+                    env_vars['slack_channel_id'],
+                    summary_text,
+                    google_doc_url
+                )
+            
+            if not success:
+                logger.error("Slackへの投稿に失敗しました。")
+                return False
+            
+            logger.info("Slackへの投稿が完了しました。")
+            posted = True
+        finally:
+            if not posted and slack_stream.ts:
+                # 生成途中のメッセージが「生成中」のまま残らないよう削除する
+                await asyncio.to_thread(slack_stream.abort)
+        
+        mark_transcript_posted(env_vars['target_directory'])
         logger.info("=== 処理が正常に完了しました ===")
         return True
         
@@ -96,7 +130,7 @@ def run_with_error_handling():
     エラーハンドリングを含む実行ラッパー
     """
     try:
-        success = main()
+        success = asyncio.run(main())
         if success:
             print("✅ 処理が正常に完了しました。")
             sys.exit(0)
@@ -1,15 +1,82 @@
 """
 Slackに要約を投稿するモジュール
 """
+import time
+import asyncio
 import logging
+import functools
+import aiohttp
+import orjson
 from slack_sdk import WebClient
+from slack_sdk.web.async_client import AsyncWebClient
 from slack_sdk.errors import SlackApiError
+from slack_sdk.http_retry.builtin_handlers import RateLimitErrorRetryHandler
+from slack_sdk.http_retry.builtin_async_handlers import AsyncRateLimitErrorRetryHandler
 
-# ログ設定
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def post_summary_to_slack(slack_token, channel_id, summary_text, google_doc_url):
+# レート制限（ratelimited）時にRetry-Afterに従って再試行する最大回数
+MAX_RATE_LIMIT_RETRIES = 4
+
+# 投稿ごとに内容が変わらないメッセージブロック
+_HEADER_BLOCK = {
+    "type": "header",
+    "text": {
+        "type": "plain_text",
+        "text": "📝 会議要約レポート",
+        "emoji": True
+    }
+}
+_DIVIDER_BLOCK = {
+    "type": "divider"
+}
+
+@functools.lru_cache(maxsize=4)
+def _get_client(slack_token):
+    """
+    トークンごとにSlack WebClientを作成し、再利用する
+    
+    Args:
+        slack_token (str): Slackボットトークン
+    
+    Returns:
+        WebClient: Slack WebClient
+    """
+    client = WebClient(token=slack_token)
+    client.retry_handlers.append(RateLimitErrorRetryHandler(max_retry_count=MAX_RATE_LIMIT_RETRIES))
+    return client
+
+def _json_serialize(obj):
+    """
+    リクエストボディをorjsonでJSONにシリアライズする
+    
+    標準のjsonモジュールより高速で、日本語を\\uXXXX形式にエスケープせずUTF-8のまま出力するため
+    送信サイズも小さくなる
+    
+    Args:
+        obj: シリアライズ対象のオブジェクト
+    
+    Returns:
+        str: JSON文字列
+    """
+    return orjson.dumps(obj).decode('utf-8')
+
+def _create_async_client(slack_token, session):
+    """
+    指定したaiohttpセッションを使用するSlack AsyncWebClientを作成
+    
+    Args:
+        slack_token (str): Slackボットトークン
+        session (aiohttp.ClientSession): リクエストに使用するセッション
+    
+    Returns:
+        AsyncWebClient: Slack AsyncWebClient
+    """
+    client = AsyncWebClient(token=slack_token, session=session)
+    client.retry_handlers.append(AsyncRateLimitErrorRetryHandler(max_retry_count=MAX_RATE_LIMIT_RETRIES))
+    return client
+
+async def post_summary_to_slack(slack_token, channel_id, summary_text, google_doc_url):
     """
     生成AIで要約されたテキストと、元のGoogle DocのURLをSlackの指定チャンネルに投稿
     
@@ -23,20 +90,19 @@ def post_summary_to_slack(slack_token, channel_id, summary_text, google_doc_url)
         bool: 成功した場合はTrue、失敗した場合はFalse
     """
     try:
-        # Slack WebClientの初期化
-        client = WebClient(token=slack_token)
-        
         # メッセージの作成
         message = _create_slack_message(summary_text, google_doc_url)
         
         logger.info(f"Slackチャンネル {channel_id} に投稿を開始します...")
         
-        # Slackにメッセージを投稿
-        response = client.chat_postMessage(
-            channel=channel_id,
-            text="📝 会議の要約が完了しました",  # 通知用のプレーンテキスト
-            blocks=message["blocks"]  # リッチフォーマット用のブロック
-        )
+        # Slackにメッセージを投稿（リクエストボディはorjsonでシリアライズ）
+        async with aiohttp.ClientSession(json_serialize=_json_serialize) as session:
+            client = _create_async_client(slack_token, session)
+            response = await client.chat_postMessage(
+                channel=channel_id,
+                text="📝 会議の要約が完了しました",  # 通知用のプレーンテキスト
+                blocks=message["blocks"]  # リッチフォーマット用のブロック
+            )
         
         if response["ok"]:
             logger.info(f"Slackへの投稿が成功しました。メッセージTS: {response['ts']}")
@@ -52,6 +118,115 @@ def post_summary_to_slack(slack_token, channel_id, summary_text, google_doc_url)
         logger.error(f"Slack投稿でエラーが発生しました: {str(e)}")
         return False
 
+class StreamingSlackPost:
+    """
+    生成中の要約を段階的にSlackへ投稿する
+    
+    最初の議題セクションが揃った時点で投稿し、以降はchat_updateで同じメッセージを更新する。
+    SlackのレートリミットのためSlackへの更新はmin_interval秒に1回までに間引く。
+    """
+    
+    def __init__(self, slack_token, channel_id, google_doc_url, min_interval=1.0):
+        """
+        Args:
+            slack_token (str): Slackボットトークン
+            channel_id (str): 投稿先のSlackチャンネルID
+            google_doc_url (str): 元のGoogle DocのURL
+            min_interval (float, optional): 更新の最小間隔（秒）
+        """
+        self.client = _get_client(slack_token)
+        self.channel_id = channel_id
+        self.google_doc_url = google_doc_url
+        self.min_interval = min_interval
+        self.ts = None
+        self._last_sent = float('-inf')
+        self._disabled = False
+    
+    def update(self, summary_text):
+        """
+        生成途中の要約でメッセージを投稿または更新する（生成AIのコールバックとして使用）
+        
+        最初の投稿に失敗した場合は以降の段階的な投稿を行わない（完成後に通常の投稿を行う）
+        
+        Args:
+            summary_text (str): それまでに生成された要約テキスト
+        """
+        if self._disabled:
+            return
+        if self.ts is None:
+            # 最初の「### 」セクションが閉じる（次の見出しが現れる）まで投稿しない
+            first = summary_text.find('### ')
+            if first == -1 or summary_text.find('### ', first + 4) == -1:
+                return
+        # 失敗した試行も含めて更新間隔を間引く
+        if time.monotonic() - self._last_sent < self.min_interval:
+            return
+        
+        try:
+            self._send(
+                summary_text + "\n\n_⏳ 要約を生成中..._",
+                "⏳ 会議の要約を生成中です..."
+            )
+        except Exception as e:
+            logger.warning(f"生成途中の要約の投稿に失敗しました: {str(e)}")
+            if self.ts is None:
+                self._disabled = True
+        finally:
+            self._last_sent = time.monotonic()
+    
+    def finalize(self, summary_text):
+        """
+        完成した要約でメッセージを投稿または更新する
+        
+        Args:
+            summary_text (str): 生成AIによって要約されたテキスト
+        
+        Returns:
+            bool: 成功した場合はTrue、失敗した場合はFalse
+        """
+        try:
+            self._send(summary_text, "📝 会議の要約が完了しました")
+            logger.info(f"Slackへの投稿が成功しました。メッセージTS: {self.ts}")
+            return True
+        except SlackApiError as e:
+            logger.error(f"Slack API エラー: {e.response['error']}")
+            return False
+        except Exception as e:
+            logger.error(f"Slack投稿でエラーが発生しました: {str(e)}")
+            return False
+    
+    def abort(self):
+        """
+        生成途中で投稿したメッセージを削除する（要約の生成や投稿に失敗した場合に使用）
+        
+        「生成中」のまま残ったメッセージと、次回実行時の再投稿が重複しないようにする
+        """
+        if self.ts is None:
+            return
+        try:
+            self.client.chat_delete(channel=self.channel_id, ts=self.ts)
+            logger.info(f"生成途中のメッセージを削除しました。メッセージTS: {self.ts}")
+            self.ts = None
+        except Exception as e:
+            logger.error(f"生成途中のメッセージの削除に失敗しました: {str(e)}")
+    
+    def _send(self, summary_text, notification_text):
+        message = _create_slack_message(summary_text, self.google_doc_url)
+        if self.ts is None:
+            response = self.client.chat_postMessage(
+                channel=self.channel_id,
+                text=notification_text,
+                blocks=message["blocks"]
+            )
+            self.ts = response["ts"]
+        else:
+            self.client.chat_update(
+                channel=self.channel_id,
+                ts=self.ts,
+                text=notification_text,
+                blocks=message["blocks"]
+            )
+
 def _create_slack_message(summary_text, google_doc_url):
     """
     Slack投稿用のメッセージを作成
@@ -63,19 +238,10 @@ def _create_slack_message(summary_text, google_doc_url):
     Returns:
         dict: Slack Block Kit形式のメッセージ
     """
-    # メッセージブロックの作成
+    # メッセージブロックの作成（固定部分はモジュール定数を共有）
     blocks = [
-        {
-            "type": "header",
-            "text": {
-                "type": "plain_text",
-                "text": "📝 会議要約レポート",
-                "emoji": True
-            }
-        },
-        {
-            "type": "divider"
-        },
+        _HEADER_BLOCK,
+        _DIVIDER_BLOCK,
         {
             "type": "section",
             "text": {
@@ -83,9 +249,7 @@ def _create_slack_message(summary_text, google_doc_url):
                 "text": summary_text
             }
         },
-        {
-            "type": "divider"
-        },
+        _DIVIDER_BLOCK,
         {
             "type": "section",
             "text": {
@@ -98,7 +262,7 @@ def _create_slack_message(summary_text, google_doc_url):
             "elements": [
                 {
                     "type": "mrkdwn",
-                    "text": f"🤖 自動生成された要約 | 生成日時: <!date^{int(__import__('time').time())}^{{date_short_pretty}} {{time}}|エラー>"
+                    "text": f"🤖 自動生成された要約 | 生成日時: <!date^{int(time.time())}^{{date_short_pretty}} {{time}}|エラー>"
                 }
             ]
         }
@@ -142,8 +306,8 @@ def post_simple_message_to_slack(slack_token, channel_id, summary_text, google_d
         bool: 成功した場合はTrue、失敗した場合はFalse
     """
     try:
-        # Slack WebClientの初期化
-        client = WebClient(token=slack_token)
+        # Slack WebClientの取得
+        client = _get_client(slack_token)
         
         # シンプルなメッセージの作成
         message = _create_simple_slack_message(summary_text, google_doc_url)
@@ -181,7 +345,7 @@ def test_slack_connection(slack_token):
         bool: 接続に成功した場合はTrue、失敗した場合はFalse
     """
     try:
-        client = WebClient(token=slack_token)
+        client = _get_client(slack_token)
         
         # API接続テスト
         response = client.auth_test()
@@ -201,7 +365,8 @@ def test_slack_connection(slack_token):
         return False
 
 if __name__ == "__main__":
-    # テスト実行用
+    # テスト実行用（ログ設定はmain.pyで一元管理しているため、単体実行時のみ設定する）
+    logging.basicConfig(level=logging.INFO)
     from config import load_environment_variables
     
     try:
@@ -233,12 +398,12 @@ if __name__ == "__main__":
             test_url = "https://docs.google.com/document/d/test_document_id"
             
             # テスト投稿
-            success = post_summary_to_slack(
+            success = asyncio.run(post_summary_to_slack(
                 env_vars['slack_bot_token'],
                 env_vars['slack_channel_id'],
                 test_summary,
                 test_url
-            )
+            ))
             
             if success:
                 print("テスト投稿に成功しました。")